@@ -11,7 +11,7 @@ Telegram Bot (Termux‑ready) with:
 
 How to run (Termux example):
   pkg install python git -y
-  pip install python-telegram-bot==13.15 requests pytz
+  pip install python-telegram-bot==13.15 requests cachetools orjson tzdata
   export BOT_TOKEN="<your_telegram_bot_token>"
   export API_TOKEN="<your_osint_api_token>"
   export ADMIN_IDS="123456789,987654321"  # comma-separated Telegram user IDs
@@ -22,12 +22,21 @@ Note: Do NOT hardcode secrets in the file; use environment variables above.
 
 import os
 import re
-import json
+import orjson
 import time
 import math
+import heapq
+import fcntl
+import atexit
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import pytz
+from zoneinfo import ZoneInfo
+from cachetools import LRUCache, TTLCache
 
 from telegram import ReplyKeyboardMarkup, Update
 from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext
@@ -39,25 +48,77 @@ warnings.filterwarnings("ignore")
 # ========= CONFIG =========
 BOT_TOKEN     = os.getenv("BOT_TOKEN", "8082482810:AAGg0-3oDRDfc5e127iCAh8YVr8Byxhx1Qk")
 API_TOKEN     = os.getenv("API_TOKEN", "")
-ADMIN_IDS     = list({int(x) for x in os.getenv("ADMIN_IDS", "7917120388").split(",") if x.strip().isdigit()})
+ADMIN_IDS     = frozenset({int(x) for x in os.getenv("ADMIN_IDS", "7917120388").split(",") if x.strip().isdigit()})
 LANG          = os.getenv("LANG", "en")
 LIMIT         = int(os.getenv("LIMIT", "10000"))
 URL           = os.getenv("OSINT_URL", "https://leakosintapi.com/")
 MEMBERS_FILE  = os.getenv("MEMBERS_FILE", "members.json")
+MEMBERS_TMP_FILE = MEMBERS_FILE + ".tmp"
+MEMBERS_LOCK_FILE = MEMBERS_FILE + ".lock"
+
+_IST = ZoneInfo("Asia/Kolkata")
+_STRFTIME_FMT = "%d-%m-%Y %I:%M:%S %p"
 
 HTTP_TIMEOUT = 15
 HTTP_RETRIES = 3
 HTTP_RETRY_SLEEP = 3
 CREDIT_COST_PER_QUERY = 1
 SEARCH_COOLDOWN_SECONDS = 3
-
-MEMBERS = {}        # uid -> {"expiry": datetime, "credit": int/float('inf'), "name": str}
+REPORT_MAX_CHARS = 3900  # Telegram caps a message at 4096 chars; keep room for the footer
+ENTRY_CLIPPED_MARKER = "\n…(entry truncated)"
+SAVE_DEBOUNCE_SECONDS = 0.5
+UPDATE_WORKERS = 8  # handlers run in parallel so one slow OSINT call doesn't block everyone
+ADMIN_STATUS_REFRESH_SECONDS = 30  # "Left: Xh Ym" is coarse; reuse it this long
+LOCK_RETRIES = 3
+LOCK_RETRY_SLEEP = 0.05   # doubled on every retry: 50ms, 100ms, 200ms
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "1000"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
+STALE_CACHE_MAX_SIZE = 5000
+STALE_PREFIX = "⚠️ Upstream unreachable — showing last known result:\n\n"
+
+# Members, stored column-wise; a uid is a member iff it is in EXPIRY_BY_UID
+EXPIRY_BY_UID = {}  # uid -> datetime (datetime.max for lifetime)
+CREDIT_BY_UID = {}  # uid -> int / float('inf')
+NAME_BY_UID = {}    # uid -> str
 LAST_QUERY_AT = {}  # uid -> datetime (cooldown)
+QUERY_IN_FLIGHT = set()  # uids with a search currently running
+EXPIRY_HEAP = []    # min-heap of (expiry timestamp, uid); may hold outdated entries
+_ADMIN_STATUS_CACHE = {"text": None, "invalid": True, "at": 0.0}
+REPORT_CACHE = TTLCache(maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL)  # normalized query -> report text
+STALE_CACHE = LRUCache(maxsize=STALE_CACHE_MAX_SIZE)  # same, never expires (outage fallback)
+
+# One pooled keep-alive session: reuses the TLS connection to the OSINT API
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=HTTP_RETRIES - 1,  # Retry counts retries, HTTP_RETRIES counts attempts
+        backoff_factor=HTTP_RETRY_SLEEP,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=None,  # POST too, like the old manual retry loop
+        raise_on_status=False,
+        # a 503 with Retry-After: 3600 must not park a worker for an hour;
+        # fail fast so the stale-cache fallback can answer instead
+        respect_retry_after_header=False,
+    ),
+))
+
+# Handlers run on UPDATE_WORKERS threads: member dicts, EXPIRY_HEAP,
+# LAST_QUERY_AT and QUERY_IN_FLIGHT are only touched under _STATE_LOCK, the report caches under
+# _CACHE_LOCK. RLock so a shutdown flush can't deadlock its own thread.
+_STATE_LOCK = threading.RLock()
+_CACHE_LOCK = threading.Lock()
+
+_SAVE_TIMER = None  # pending debounced save_members() call
+_SAVE_TIMER_LOCK = threading.Lock()
+# flocks on separate fds conflict even within one process; this serializes our
+# own saves so the flock retry budget only ever waits on other processes
+_SAVE_LOCK = threading.Lock()
 
 # ========= UTILITIES =========
 def get_ist_time() -> str:
-    tz = pytz.timezone("Asia/Kolkata")
-    return datetime.now(tz).strftime("%d-%m-%Y %I:%M:%S %p")
+    return datetime.now(_IST).strftime(_STRFTIME_FMT)
 
 
 def is_admin(uid: int) -> bool:
@@ -77,94 +138,248 @@ def _iso_to_dt(s: str) -> datetime:
         return datetime.now()
 
 
-def load_members():
-    """Load members.json into MEMBERS dict."""
-    global MEMBERS
-    if not os.path.exists(MEMBERS_FILE):
-        MEMBERS = {}
+@contextmanager
+def _with_lock(path: str, mode: int):
+    """Hold an advisory flock (fcntl.LOCK_SH / LOCK_EX) on *path* for the block."""
+    delay = LOCK_RETRY_SLEEP
+    for attempt in range(LOCK_RETRIES + 1):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            if attempt == LOCK_RETRIES:
+                raise TimeoutError(f"Could not lock {path}")
+            time.sleep(delay)
+            delay *= 2
+            continue
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
         return
+
+
+def _recover_from_temp_file():
+    """Promote a leftover members.json.tmp if it is valid and newer/larger."""
     try:
-        with open(MEMBERS_FILE, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-        tmp = {}
-        for uid_str, info in raw.items():
+        tmp_stat = os.stat(MEMBERS_TMP_FILE)
+    except FileNotFoundError:
+        return
+    try:
+        try:
+            main_stat = os.stat(MEMBERS_FILE)
+        except FileNotFoundError:
+            main_stat = None
+        if main_stat and tmp_stat.st_mtime <= main_stat.st_mtime and tmp_stat.st_size <= main_stat.st_size:
+            os.unlink(MEMBERS_TMP_FILE)
+            return
+        with open(MEMBERS_TMP_FILE, "rb") as f:
+            orjson.loads(f.read())
+        os.replace(MEMBERS_TMP_FILE, MEMBERS_FILE)
+    except Exception:
+        # half-written temp file: the main file is still the good copy
+        try:
+            os.unlink(MEMBERS_TMP_FILE)
+        except OSError:
+            pass
+
+
+def set_member(uid: int, expiry: datetime, credit, name: str):
+    EXPIRY_BY_UID[uid] = expiry
+    CREDIT_BY_UID[uid] = credit
+    NAME_BY_UID[uid] = name
+
+
+def remove_member(uid: int):
+    EXPIRY_BY_UID.pop(uid, None)
+    CREDIT_BY_UID.pop(uid, None)
+    NAME_BY_UID.pop(uid, None)
+
+
+def _clear_members():
+    EXPIRY_BY_UID.clear()
+    CREDIT_BY_UID.clear()
+    NAME_BY_UID.clear()
+
+
+def load_members():
+    """Load members.json into the EXPIRY/CREDIT/NAME_BY_UID dicts."""
+    # one exclusive lock covers temp-file recovery and the read.
+    # lock errors propagate: an unreadable lock must not look like an empty file
+    with _with_lock(MEMBERS_LOCK_FILE, fcntl.LOCK_EX):
+        _recover_from_temp_file()
+        try:
             try:
-                uid = int(uid_str)
-            except ValueError:
-                continue
-            expiry = _iso_to_dt(info.get("expiry", datetime.now().isoformat()))
-            credit_raw = info.get("credit", 0)
-            if isinstance(credit_raw, str) and credit_raw == "inf":
-                credit = float("inf")
-            else:
+                f = open(MEMBERS_FILE, "rb")
+            except FileNotFoundError:
+                _clear_members()
+                return
+            with f:
+                raw = orjson.loads(f.read())
+            rows = []
+            for uid_str, info in raw.items():
                 try:
-                    credit = int(credit_raw)
-                except Exception:
-                    credit = 0
-            name = info.get("name", "")
-            tmp[uid] = {"expiry": expiry, "credit": credit, "name": name}
-        MEMBERS = tmp
-    except Exception:
-        MEMBERS = {}
+                    uid = int(uid_str)
+                except ValueError:
+                    continue
+                expiry = _iso_to_dt(info.get("expiry", datetime.now().isoformat()))
+                credit_raw = info.get("credit", 0)
+                if isinstance(credit_raw, str) and credit_raw == "inf":
+                    credit = float("inf")
+                else:
+                    try:
+                        credit = int(credit_raw)
+                    except Exception:
+                        credit = 0
+                name = info.get("name", "")
+                rows.append((uid, expiry, credit, name))
+            _clear_members()
+            for row in rows:
+                set_member(*row)
+            _rebuild_expiry_heap()
+            invalidate_admin_status()
+        except Exception:
+            _clear_members()
 
 
 def save_members():
-    data = {}
-    for uid, info in MEMBERS.items():
-        credit_val = info.get("credit", 0)
-        credit_out = "inf" if (isinstance(credit_val, float) and math.isinf(credit_val)) else credit_val
-        data[str(uid)] = {
-            "expiry": _dt_to_iso(info.get("expiry", datetime.now())),
-            "credit": credit_out,
-            "name": info.get("name", "")
-        }
-    with open(MEMBERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # snapshot and write as one unit, so an older snapshot never lands last
+    with _SAVE_LOCK:
+        data = {}
+        with _STATE_LOCK:
+            for uid, expiry in EXPIRY_BY_UID.items():
+                credit_val = CREDIT_BY_UID.get(uid, 0)
+                credit_out = "inf" if (isinstance(credit_val, float) and math.isinf(credit_val)) else credit_val
+                data[str(uid)] = {
+                    "expiry": _dt_to_iso(expiry),
+                    "credit": credit_out,
+                    "name": NAME_BY_UID.get(uid, "")
+                }
+        payload = orjson.dumps(data)  # compact UTF-8 bytes
+        # write-then-rename so a crash mid-write never truncates members.json
+        with _with_lock(MEMBERS_LOCK_FILE, fcntl.LOCK_EX):
+            try:
+                with open(MEMBERS_TMP_FILE, "wb") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(MEMBERS_TMP_FILE, MEMBERS_FILE)
+            finally:
+                if os.path.exists(MEMBERS_TMP_FILE):
+                    os.unlink(MEMBERS_TMP_FILE)
+
+
+def invalidate_admin_status():
+    _ADMIN_STATUS_CACHE["invalid"] = True
+
+
+def schedule_save():
+    """Coalesce bursts of member changes into one delayed save_members()."""
+    global _SAVE_TIMER
+    # every member mutation ends up here, so this is the one invalidation point
+    invalidate_admin_status()
+    with _SAVE_TIMER_LOCK:
+        if _SAVE_TIMER is not None:
+            _SAVE_TIMER.cancel()
+        _SAVE_TIMER = threading.Timer(SAVE_DEBOUNCE_SECONDS, _debounced_save)
+        _SAVE_TIMER.daemon = True
+        _SAVE_TIMER.start()
+
+
+def _debounced_save():
+    try:
+        save_members()
+    except Exception as e:
+        # don't let the write die with the timer thread; try again shortly
+        print(f"[WARN] Saving members failed, retrying: {e}")
+        schedule_save()
+
+
+def flush_members():
+    """Cancel any pending delayed save and write members to disk now."""
+    global _SAVE_TIMER
+    with _SAVE_TIMER_LOCK:
+        if _SAVE_TIMER is not None:
+            _SAVE_TIMER.cancel()
+            _SAVE_TIMER = None
+    save_members()
 
 
 def ensure_lifetime_admins():
     changed = False
     for aid in ADMIN_IDS:
-        current = MEMBERS.get(aid)
-        if not current:
-            MEMBERS[aid] = {"expiry": datetime.max, "credit": float("inf"), "name": MEMBERS.get(aid, {}).get("name", "")}
+        if aid not in EXPIRY_BY_UID:
+            set_member(aid, datetime.max, float("inf"), "")
             changed = True
         else:
             upd = False
-            if current.get("expiry") != datetime.max:
-                current["expiry"] = datetime.max
+            if EXPIRY_BY_UID[aid] != datetime.max:
+                EXPIRY_BY_UID[aid] = datetime.max
                 upd = True
-            if not (isinstance(current.get("credit"), float) and math.isinf(current.get("credit", 0))):
-                current["credit"] = float("inf")
+            credit = CREDIT_BY_UID.get(aid, 0)
+            if not (isinstance(credit, float) and math.isinf(credit)):
+                CREDIT_BY_UID[aid] = float("inf")
                 upd = True
             if upd:
                 changed = True
     if changed:
-        save_members()
+        schedule_save()
+
+
+def track_expiry(uid: int):
+    """Register uid's current expiry with cleanup_expired_members()."""
+    expiry = EXPIRY_BY_UID.get(uid)
+    if expiry is None or expiry == datetime.max:
+        return  # lifetime entries never expire
+    heapq.heappush(EXPIRY_HEAP, (expiry.timestamp(), uid))
+
+
+def _rebuild_expiry_heap():
+    EXPIRY_HEAP.clear()
+    for uid in EXPIRY_BY_UID:
+        track_expiry(uid)
 
 
 def cleanup_expired_members():
-    now = datetime.now()
+    now_ts = datetime.now().timestamp()
     removed = False
-    for uid in list(MEMBERS.keys()):
-        if uid in ADMIN_IDS:
+    while EXPIRY_HEAP and EXPIRY_HEAP[0][0] <= now_ts:
+        ts, uid = heapq.heappop(EXPIRY_HEAP)
+        expiry = EXPIRY_BY_UID.get(uid)
+        # skip entries outdated by a removal, re-activation or admin promotion
+        if expiry is None or uid in ADMIN_IDS or expiry.timestamp() != ts:
             continue
-        member = MEMBERS[uid]
-        credit = member.get("credit", 0)
-        if member.get("expiry", now) <= now or (not math.isinf(credit) and credit <= 0):
-            del MEMBERS[uid]
-            removed = True
+        remove_member(uid)
+        removed = True
     if removed:
-        save_members()
+        schedule_save()
+
+
+def drop_if_out_of_credit(uid: int) -> bool:
+    """Remove a non-admin member whose credits are used up; call after changing credit."""
+    if uid not in EXPIRY_BY_UID or uid in ADMIN_IDS:
+        return False
+    credit = CREDIT_BY_UID.get(uid, 0)
+    if math.isinf(credit) or credit > 0:
+        return False
+    remove_member(uid)
+    schedule_save()
+    return True
+
+
+_EMAIL_RE = re.compile(r"^[\w\.-]+@[\w\.-]+\.[A-Za-z]{2,}$")
+_PHONE_STRIP_RE = re.compile(r"[ \-.,]")
 
 
 def clean_input(query: str):
     q = (query or "").strip()
     # email
-    if re.match(r"^[\w\.-]+@[\w\.-]+\.[A-Za-z]{2,}$", q):
+    if _EMAIL_RE.match(q):
         return q
     # phone (normalize spaces, hyphens, commas, dots)
-    q2 = re.sub(r"[ \-.,]", "", q)
+    q2 = _PHONE_STRIP_RE.sub("", q)
     if q2.isdigit() and len(q2) == 10:
         return "+91" + q2
     if q2.startswith("+91") and len(q2) == 13 and q2[1:].isdigit():
@@ -172,16 +387,12 @@ def clean_input(query: str):
     return None
 
 
-def post_with_retry(url: str, json_payload: dict):
-    last_error = None
-    for _ in range(HTTP_RETRIES):
-        try:
-            resp = requests.post(url, json=json_payload, timeout=HTTP_TIMEOUT)
-            return resp
-        except requests.exceptions.RequestException as e:
-            last_error = e
-            time.sleep(HTTP_RETRY_SLEEP)
-    return None
+def post_with_retry(url: str, json_payload: dict, stream: bool = False):
+    # retries/backoff are handled by the adapter mounted on SESSION
+    try:
+        return SESSION.post(url, json=json_payload, timeout=HTTP_TIMEOUT, stream=stream)
+    except requests.exceptions.RequestException:
+        return None
 
 # Pretty labels for known keys
 KEY_EMOJI_MAP = {
@@ -195,21 +406,11 @@ KEY_EMOJI_MAP = {
     "Age": "🧮 Age",
     "Password": "✍️ Password",
     "Phone": "☎️ Mobile",
-    "Phone2": "📱 Alt Mobile", "Phone3": "📱 Alt Mobile", "Phone4": "📱 Alt Mobile",
-    "Phone5": "📱 Alt Mobile", "Phone6": "📱 Alt Mobile", "Phone7": "📱 Alt Mobile",
-    "Phone8": "📱 Alt Mobile", "Phone9": "📱 Alt Mobile", "Phone10": "📱 Alt Mobile",
     "Mobile": "☎️ Mobile",
-    "Mobile2": "📱 Alt Mobile", "Mobile3": "📱 Alt Mobile", "Mobile4": "📱 Alt Mobile",
-    "Mobile5": "📱 Alt Mobile", "Mobile6": "📱 Alt Mobile", "Mobile7": "📱 Alt Mobile",
-    "Mobile8": "📱 Alt Mobile", "Mobile9": "📱 Alt Mobile", "Mobile10": "📱 Alt Mobile",
     "Email": "📧 Email",
     "DocNumber": "🪪 Aadhar/PAN",
     "PassportNumber": "🪪 Aadhar No. ",
     "Address": "🔎 Address",
-    "Address1": "🔎 Alt Address", "Address2": "🔎 Alt Address", "Address3": "🔎 Alt Address",
-    "Address4": "🔎 Alt Address", "Address5": "🔎 Alt Address", "Address6": "🔎 Alt Address",
-    "Address7": "🔎 Alt Address", "Address8": "🔎 Alt Address", "Address9": "🔎 Alt Address",
-    "Address10": "🔎 Alt Address",
     "CompanyName": "🏢 Company",
     "City": "🏙️ City",
     "District": "🗺️ District",
@@ -225,6 +426,33 @@ KEY_EMOJI_MAP = {
     "Whatsapp": "💬 WhatsApp",
 }
 
+# Numbered variants (Phone2, Mobile3, Address1, ...) share one label per prefix
+ALT_KEY_LABELS = {
+    "Phone": "📱 Alt Mobile",
+    "Mobile": "📱 Alt Mobile",
+    "Address": "🔎 Alt Address",
+}
+ALT_KEY_NUMBERS = {
+    "Phone": range(2, 11),
+    "Mobile": range(2, 11),
+    "Address": range(1, 11),
+}
+_ALT_KEY_RE = re.compile(r"^(Phone|Mobile|Address)\d+$")
+
+
+def _ordered_labels():
+    """KEY_EMOJI_MAP order, with each prefix's numbered variants right after it."""
+    out = []
+    for key, label in KEY_EMOJI_MAP.items():
+        out.append((key, label))
+        for n in ALT_KEY_NUMBERS.get(key, ()):
+            out.append((f"{key}{n}", ALT_KEY_LABELS[key]))
+    return tuple(out)
+
+
+_ORDERED_LABELS = _ordered_labels()
+_ORDERED_KEYS = frozenset(key for key, _ in _ORDERED_LABELS)
+
 
 def _append_line(lines, label, val):
     if val is None:
@@ -238,25 +466,61 @@ def _append_line(lines, label, val):
 def format_entry(entry: dict, idx: int) -> str:
     lines = [f"— Result {idx} —"]
     # known keys first (in this order)
-    for key, label in KEY_EMOJI_MAP.items():
+    for key, label in _ORDERED_LABELS:
         if key in entry:
-            _append_line(lines, label, entry.get(key))
-    # any extra keys
-    for key in entry:
-        if key not in KEY_EMOJI_MAP:
-            _append_line(lines, key, entry.get(key))
+            _append_line(lines, label, entry[key])
+    # any extra keys; numbered variants past the table still get the Alt label
+    for key, val in entry.items():
+        if key not in _ORDERED_KEYS:
+            m = _ALT_KEY_RE.match(key)
+            _append_line(lines, ALT_KEY_LABELS[m.group(1)] if m else key, val)
     return "\n".join(lines)
 
 
+def _cache_key(query: str) -> str:
+    return query.strip().lower()
+
+
+def _stale_or(query: str, error: str) -> str:
+    """Last known result for query (marked stale) if any, else the error text."""
+    with _CACHE_LOCK:
+        stale = STALE_CACHE.get(_cache_key(query))
+    return STALE_PREFIX + stale if stale is not None else error
+
+
 def generate_report(query: str) -> str:
+    key = _cache_key(query)
+    with _CACHE_LOCK:
+        cached = REPORT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    report = _fetch_report(query)
+    # only cache real results; errors are usually transient
+    if not report.startswith(("🚫", STALE_PREFIX)):
+        with _CACHE_LOCK:
+            REPORT_CACHE[key] = report
+            STALE_CACHE[key] = report
+    return report
+
+
+def _fetch_report(query: str) -> str:
     payload = {"token": API_TOKEN, "request": query.strip(), "limit": LIMIT, "lang": LANG}
     try:
-        resp = post_with_retry(URL, payload)
-        if not resp:
-            return "🚫 Server Problem, Please Contact Bot Owner"
-        if resp.status_code != 200:
-            return f"🚫 Server Error: HTTP {resp.status_code}"
-        data = resp.json()
+        resp = post_with_retry(URL, payload, stream=True)
+        if resp is None:
+            return _stale_or(query, "🚫 Server Problem, Please Contact Bot Owner")
+        try:
+            if resp.status_code != 200:
+                return _stale_or(query, f"🚫 Server Error: HTTP {resp.status_code}")
+            # read the body straight off the socket: no requests-side copy of it.
+            # a connection lost mid-body surfaces here as a urllib3 error
+            try:
+                body = resp.raw.read(decode_content=True)
+            except (Urllib3HTTPError, OSError):
+                return _stale_or(query, "🚫 Server Problem, Please Contact Bot Owner")
+            data = orjson.loads(body)
+        finally:
+            resp.close()  # streamed responses hold their pooled connection until closed
     except Exception:
         return "🚫 Server Problem, Please Contact Bot Owner"
 
@@ -266,10 +530,22 @@ def generate_report(query: str) -> str:
 
     results = []
     count = 1
+    total_len = 0
     try:
-        for _db, block in data["List"].items():
-            for entry in (block or {}).get("Data", []):
-                results.append(format_entry(entry, count))
+        blocks = [(block or {}).get("Data", []) for block in data["List"].values()]
+        total = sum(len(rows) for rows in blocks)
+        for rows in blocks:
+            for entry in rows:
+                entry_str = format_entry(entry, count)
+                # a single huge row must not push the message past Telegram's limit
+                if len(entry_str) > REPORT_MAX_CHARS:
+                    entry_str = entry_str[:REPORT_MAX_CHARS - len(ENTRY_CLIPPED_MARKER)] + ENTRY_CLIPPED_MARKER
+                # stop formatting once the text would no longer fit in one message
+                if results and total_len + len(entry_str) + 2 > REPORT_MAX_CHARS:
+                    results.append(f"…and {total - count + 1} more results truncated")
+                    return "\n\n".join(results)
+                results.append(entry_str)
+                total_len += len(entry_str) + 2
                 count += 1
     except Exception:
         return "🚫 Response format changed. Please contact bot owner."
@@ -302,22 +578,21 @@ def safe_send(bot, chat_id, text, reply_markup=None):
 # ========= HANDLERS =========
 
 def start(update: Update, context: CallbackContext):
-    load_members()
-    ensure_lifetime_admins()
-    cleanup_expired_members()
-
     uid = update.effective_user.id
     name = (update.effective_user.first_name or "").strip()
 
-    # store/refresh user name for status list
-    info = MEMBERS.get(uid)
-    if info:
-        if name and info.get("name") != name:
-            info["name"] = name
-            save_members()
-    else:
-        # not a member; name will be saved later upon activation
-        pass
+    with _STATE_LOCK:
+        ensure_lifetime_admins()
+        cleanup_expired_members()
+
+        # store/refresh user name for status list
+        if uid in EXPIRY_BY_UID:
+            if name and NAME_BY_UID.get(uid) != name:
+                NAME_BY_UID[uid] = name
+                schedule_save()
+        else:
+            # not a member; name will be saved later upon activation
+            pass
 
     if is_admin(uid):
         update.message.reply_text("Admin Panel:", reply_markup=admin_keyboard())
@@ -326,14 +601,26 @@ def start(update: Update, context: CallbackContext):
 
 
 def _admin_status_text() -> str:
-    if not MEMBERS:
+    cache = _ADMIN_STATUS_CACHE
+    with _STATE_LOCK:
+        if (not cache["invalid"] and cache["text"]
+                and time.monotonic() - cache["at"] < ADMIN_STATUS_REFRESH_SECONDS):
+            return cache["text"]
+        cache["text"] = _build_admin_status_text()
+        cache["invalid"] = False
+        cache["at"] = time.monotonic()
+        return cache["text"]
+
+
+def _build_admin_status_text() -> str:
+    if not EXPIRY_BY_UID:
         return "No members yet."
     now = datetime.now()
     lines = ["👑 Admin Status — All Members"]
-    for uid, info in sorted(MEMBERS.items(), key=lambda kv: kv[0]):
-        credit = info.get("credit", 0)
+    for uid in sorted(EXPIRY_BY_UID):
+        expiry = EXPIRY_BY_UID[uid]
+        credit = CREDIT_BY_UID.get(uid, 0)
         credit_text = "∞" if (isinstance(credit, float) and math.isinf(credit)) else str(credit)
-        expiry = info.get("expiry", now)
         lifetime = expiry == datetime.max or (isinstance(credit, float) and math.isinf(credit))
         if lifetime:
             left_text = "∞"
@@ -343,203 +630,316 @@ def _admin_status_text() -> str:
             hours, remainder = divmod(int(remaining.total_seconds()), 3600)
             minutes, _ = divmod(remainder, 60)
             left_text = f"{hours}h {minutes}m"
-            exp_text = expiry.strftime("%d-%m-%Y %I:%M:%S %p")
+            exp_text = expiry.strftime(_STRFTIME_FMT)
         role = "(Admin)" if uid in ADMIN_IDS else "(Member)"
-        name = info.get("name", "")
+        name = NAME_BY_UID.get(uid, "")
         display = f"{uid} {role} {('- ' + name) if name else ''}".strip()
         lines.append(f"🟢 {display}\n💳 Credits: {credit_text} | ⏳ Left: {left_text}\n📆 Exp: {exp_text}")
     return "\n\n".join(lines)
 
 
-def handle_message(update: Update, context: CallbackContext):
-    load_members()  # ensure latest
-    ensure_lifetime_admins()
-    cleanup_expired_members()
+def _claim_query(user_id: int, context: CallbackContext, member: bool):
+    """Atomically start a search for user_id; returns a refusal text, or None once claimed.
 
-    user_id = update.effective_user.id
-    text = (update.message.text or "").strip()
-    first_name = update.effective_user.first_name or ""
+    The caller must release_query(user_id) when the search is done.
+    """
+    with _STATE_LOCK:
+        # handlers run in parallel: without this one user could fire several paid searches at once
+        if user_id in QUERY_IN_FLIGHT:
+            return "⏳ Wait before next query."
+        last = LAST_QUERY_AT.get(user_id)
+        if last and (datetime.now() - last).total_seconds() < SEARCH_COOLDOWN_SECONDS:
+            return "⏳ Wait before next query."
+        if member:
+            if user_id not in EXPIRY_BY_UID:
+                context.user_data.pop('awaiting_query', None)
+                return "❌ Not an active member."
+            if _member_expired(user_id):
+                context.user_data.pop('awaiting_query', None)
+                return "❌ Membership expired. Contact admin."
+        QUERY_IN_FLIGHT.add(user_id)
+        LAST_QUERY_AT[user_id] = datetime.now()
+        context.user_data.pop('awaiting_query', None)
+    return None
 
-    # persist name whenever we see the user
-    if user_id in MEMBERS:
-        if first_name and MEMBERS[user_id].get("name") != first_name:
-            MEMBERS[user_id]["name"] = first_name
-            save_members()
-
-    # ===== ADMIN FLOW =====
-    if is_admin(user_id):
-        # Commands for admin
-        if text == "Add Member":
-            context.user_data['awaiting_member_id'] = True
-            update.message.reply_text("Enter Member Chat ID:")
-            return
 
-        if context.user_data.get('awaiting_member_id'):
-            try:
-                mid = int(text)
-                context.user_data['new_member_id'] = mid
-                context.user_data.pop('awaiting_member_id', None)
-                context.user_data['awaiting_duration'] = True
-                update.message.reply_text("Select subscription duration:", reply_markup=duration_keyboard())
-            except Exception:
-                update.message.reply_text("Invalid ID. Try again.")
-            return
+def release_query(user_id: int):
+    with _STATE_LOCK:
+        QUERY_IN_FLIGHT.discard(user_id)
 
-        if context.user_data.get('awaiting_duration'):
-            dur_map = {
-                "1 Day (10 Credit)": (1, 10),
-                "3 Days (35 Credit)": (3, 35),
-                "7 Days (90 Credit)": (7, 90),
-            }
-            chosen = dur_map.get(text)
-            if chosen and 'new_member_id' in context.user_data:
-                days, credits = chosen
-                mid = context.user_data['new_member_id']
-                name = MEMBERS.get(mid, {}).get("name", "")
-                MEMBERS[mid] = {"expiry": datetime.now() + timedelta(days=days), "credit": credits, "name": name}
-                save_members()
-                update.message.reply_text(f"✅ Member {mid} activated for {days} day(s), credits: {credits}.", reply_markup=admin_keyboard())
-                context.user_data.pop('awaiting_duration', None)
-                context.user_data.pop('new_member_id', None)
-            else:
-                update.message.reply_text("Invalid selection. Try again.")
-            return
 
-        if text == "Remove Member":
-            context.user_data['awaiting_remove_id'] = True
-            update.message.reply_text("Enter Member Chat ID to remove:")
-            return
+# ----- admin commands / pending-input states -----
 
-        if context.user_data.get('awaiting_remove_id'):
-            try:
-                mid = int(text)
-                if mid in MEMBERS:
-                    del MEMBERS[mid]
-                    save_members()
-                    update.message.reply_text(f"✅ Member {mid} removed.", reply_markup=admin_keyboard())
-                else:
-                    update.message.reply_text("Member not found.", reply_markup=admin_keyboard())
-                context.user_data.pop('awaiting_remove_id', None)
-            except Exception:
-                update.message.reply_text("Invalid ID.", reply_markup=admin_keyboard())
-            return
+def _h_add_member(update: Update, context: CallbackContext, text: str):
+    context.user_data['awaiting_member_id'] = True
+    update.message.reply_text("Enter Member Chat ID:")
 
-        if text == "Update API Token":
-            context.user_data['awaiting_api_token'] = True
-            update.message.reply_text("Enter new API Token:")
-            return
 
-        if context.user_data.get('awaiting_api_token'):
-            new_token = text.strip()
-            if new_token:
-                global API_TOKEN
-                API_TOKEN = new_token
-                context.user_data.pop('awaiting_api_token', None)
-                update.message.reply_text("✅ API Token updated!", reply_markup=admin_keyboard())
-            else:
-                update.message.reply_text("Invalid token.", reply_markup=admin_keyboard())
-            return
+def _s_member_id(update: Update, context: CallbackContext, text: str):
+    try:
+        mid = int(text)
+        context.user_data['new_member_id'] = mid
+        context.user_data.pop('awaiting_member_id', None)
+        context.user_data['awaiting_duration'] = True
+        update.message.reply_text("Select subscription duration:", reply_markup=duration_keyboard())
+    except Exception:
+        update.message.reply_text("Invalid ID. Try again.")
 
-        if text == "Status":
-            safe_send(context.bot, update.effective_chat.id, _admin_status_text(), reply_markup=admin_keyboard())
-            return
 
-        if text == "Help":
-            update.message.reply_text(
-                "Admin Guide:\n• Add Member → Activate with days & credits\n• Remove Member → Remove by chat ID\n• Update API Token → Set new OSINT token\n• Status → List all members (credits/expiry)\n• Mobile/Email → Run search\n• Help → This guide",
-                reply_markup=admin_keyboard(),
-            )
-            return
+DURATION_OPTIONS = {
+    "1 Day (10 Credit)": (1, 10),
+    "3 Days (35 Credit)": (3, 35),
+    "7 Days (90 Credit)": (7, 90),
+}
 
-        if text == "Mobile/Email":
-            context.user_data['awaiting_query'] = True
-            update.message.reply_text("Enter Mobile Number or Email:")
-            return
 
-        if context.user_data.get('awaiting_query'):
-            last = LAST_QUERY_AT.get(user_id)
-            if last and (datetime.now() - last).total_seconds() < SEARCH_COOLDOWN_SECONDS:
-                update.message.reply_text("⏳ Wait before next query.", reply_markup=admin_keyboard())
-                return
-            query = clean_input(text)
-            if not query:
-                update.message.reply_text("❌ Invalid input.", reply_markup=admin_keyboard())
-                return
-            result = generate_report(query)
-            safe_send(context.bot, update.effective_chat.id, result, reply_markup=admin_keyboard())
-            LAST_QUERY_AT[user_id] = datetime.now()
-            context.user_data.pop('awaiting_query', None)
-            return
+def _s_duration(update: Update, context: CallbackContext, text: str):
+    chosen = DURATION_OPTIONS.get(text)
+    if chosen and 'new_member_id' in context.user_data:
+        days, credits = chosen
+        mid = context.user_data['new_member_id']
+        with _STATE_LOCK:
+            set_member(mid, datetime.now() + timedelta(days=days), credits, NAME_BY_UID.get(mid, ""))
+            track_expiry(mid)
+            schedule_save()
+        update.message.reply_text(f"✅ Member {mid} activated for {days} day(s), credits: {credits}.", reply_markup=admin_keyboard())
+        context.user_data.pop('awaiting_duration', None)
+        context.user_data.pop('new_member_id', None)
+    else:
+        update.message.reply_text("Invalid selection. Try again.")
 
-        update.message.reply_text("Choose option:", reply_markup=admin_keyboard())
-        return
 
-    # ===== MEMBER FLOW =====
-    if user_id not in MEMBERS:
-        update.message.reply_text("❌ Not an active member.", reply_markup=member_keyboard())
+def _h_remove_member(update: Update, context: CallbackContext, text: str):
+    context.user_data['awaiting_remove_id'] = True
+    update.message.reply_text("Enter Member Chat ID to remove:")
+
+
+def _s_remove_id(update: Update, context: CallbackContext, text: str):
+    try:
+        mid = int(text)
+        with _STATE_LOCK:
+            removed = mid in EXPIRY_BY_UID
+            if removed:
+                remove_member(mid)
+                schedule_save()
+        if removed:
+            update.message.reply_text(f"✅ Member {mid} removed.", reply_markup=admin_keyboard())
+        else:
+            update.message.reply_text("Member not found.", reply_markup=admin_keyboard())
+        context.user_data.pop('awaiting_remove_id', None)
+    except Exception:
+        update.message.reply_text("Invalid ID.", reply_markup=admin_keyboard())
+
+
+def _h_update_token(update: Update, context: CallbackContext, text: str):
+    context.user_data['awaiting_api_token'] = True
+    update.message.reply_text("Enter new API Token:")
+
+
+def _s_api_token(update: Update, context: CallbackContext, text: str):
+    global API_TOKEN
+    new_token = text.strip()
+    if new_token:
+        API_TOKEN = new_token
+        context.user_data.pop('awaiting_api_token', None)
+        update.message.reply_text("✅ API Token updated!", reply_markup=admin_keyboard())
+    else:
+        update.message.reply_text("Invalid token.", reply_markup=admin_keyboard())
+
+
+def _h_admin_status(update: Update, context: CallbackContext, text: str):
+    safe_send(context.bot, update.effective_chat.id, _admin_status_text(), reply_markup=admin_keyboard())
+
+
+def _h_admin_help(update: Update, context: CallbackContext, text: str):
+    update.message.reply_text(
+        "Admin Guide:\n• Add Member → Activate with days & credits\n• Remove Member → Remove by chat ID\n• Update API Token → Set new OSINT token\n• Status → List all members (credits/expiry)\n• Mobile/Email → Run search\n• Help → This guide",
+        reply_markup=admin_keyboard(),
+    )
+
+
+def _h_admin_mobile_email(update: Update, context: CallbackContext, text: str):
+    context.user_data['awaiting_query'] = True
+    update.message.reply_text("Enter Mobile Number or Email:")
+
+
+def _s_admin_query(update: Update, context: CallbackContext, text: str):
+    user_id = update.effective_user.id
+    query = clean_input(text)
+    if not query:
+        update.message.reply_text("❌ Invalid input.", reply_markup=admin_keyboard())
         return
+    refusal = _claim_query(user_id, context, member=False)
+    if refusal:
+        update.message.reply_text(refusal, reply_markup=admin_keyboard())
+        return
+    try:
+        result = generate_report(query)
+        safe_send(context.bot, update.effective_chat.id, result, reply_markup=admin_keyboard())
+    finally:
+        release_query(user_id)
 
-    now = datetime.now()
-    info = MEMBERS[user_id]
-    credit = info.get("credit", 0)
+
+# ----- member commands / pending-input states -----
+
+def _member_credit(uid: int):
+    credit = CREDIT_BY_UID.get(uid, 0)
     if isinstance(credit, str) and credit == "inf":
         credit = float("inf")
-    expired = info.get("expiry", now) <= now or (not math.isinf(credit) and credit <= 0)
-    remaining = max(info.get("expiry", now) - now, timedelta(seconds=0))
-    hours, remainder = divmod(int(remaining.total_seconds()), 3600)
-    minutes, _ = divmod(remainder, 60)
+    return credit
 
-    if text == "Status":
-        exp_text = "Lifetime" if math.isinf(credit) or info.get("expiry") == datetime.max else info.get("expiry").strftime("%d-%m-%Y %I:%M:%S %p")
-        credit_text = "∞" if math.isinf(credit) else str(credit)
-        safe_send(
-            context.bot,
-            update.effective_chat.id,
-            f"🟢 Active: Left: {('∞' if math.isinf(credit) or info.get('expiry') == datetime.max else f'{hours}h {minutes}m')}\n🆔 {user_id} ({first_name})\n💳 Credits: {credit_text}\n📆 Exp: {exp_text}",
-            reply_markup=member_keyboard(),
-        )
-        return
 
-    if text == "Help":
-        update.message.reply_text(
-            "Member Guide:\n• Mobile/Email → Run OSINT search\n• Status → See credits & expiry\n• Help → This guide",
-            reply_markup=member_keyboard(),
-        )
-        return
+def _member_expired(uid: int) -> bool:
+    now = datetime.now()
+    credit = _member_credit(uid)
+    return EXPIRY_BY_UID.get(uid, now) <= now or (not math.isinf(credit) and credit <= 0)
 
-    if text == "Mobile/Email":
-        if expired:
-            update.message.reply_text("❌ Membership expired. Contact admin.", reply_markup=member_keyboard())
+
+def _h_member_status(update: Update, context: CallbackContext, text: str):
+    user_id = update.effective_user.id
+    first_name = update.effective_user.first_name or ""
+    with _STATE_LOCK:
+        if user_id not in EXPIRY_BY_UID:
             return
-        context.user_data['awaiting_query'] = True
-        update.message.reply_text("Enter Mobile Number or Email:")
+        expiry = EXPIRY_BY_UID[user_id]
+        credit = _member_credit(user_id)
+    now = datetime.now()
+    remaining = max(expiry - now, timedelta(seconds=0))
+    hours, remainder = divmod(int(remaining.total_seconds()), 3600)
+    minutes, _ = divmod(remainder, 60)
+    exp_text = "Lifetime" if math.isinf(credit) or expiry == datetime.max else expiry.strftime(_STRFTIME_FMT)
+    credit_text = "∞" if math.isinf(credit) else str(credit)
+    safe_send(
+        context.bot,
+        update.effective_chat.id,
+        f"🟢 Active: Left: {('∞' if math.isinf(credit) or expiry == datetime.max else f'{hours}h {minutes}m')}\n🆔 {user_id} ({first_name})\n💳 Credits: {credit_text}\n📆 Exp: {exp_text}",
+        reply_markup=member_keyboard(),
+    )
+
+
+def _h_member_help(update: Update, context: CallbackContext, text: str):
+    update.message.reply_text(
+        "Member Guide:\n• Mobile/Email → Run OSINT search\n• Status → See credits & expiry\n• Help → This guide",
+        reply_markup=member_keyboard(),
+    )
+
+
+def _h_member_mobile_email(update: Update, context: CallbackContext, text: str):
+    if _member_expired(update.effective_user.id):
+        update.message.reply_text("❌ Membership expired. Contact admin.", reply_markup=member_keyboard())
         return
+    context.user_data['awaiting_query'] = True
+    update.message.reply_text("Enter Mobile Number or Email:")
 
-    if context.user_data.get('awaiting_query'):
-        if expired:
-            update.message.reply_text("❌ Membership expired. Contact admin.", reply_markup=member_keyboard())
-            context.user_data.pop('awaiting_query', None)
-            return
-        last = LAST_QUERY_AT.get(user_id)
-        if last and (datetime.now() - last).total_seconds() < SEARCH_COOLDOWN_SECONDS:
-            update.message.reply_text("⏳ Wait before next query.", reply_markup=member_keyboard())
-            return
-        query = clean_input(text)
-        if not query:
-            update.message.reply_text("❌ Invalid input.", reply_markup=member_keyboard())
-            return
+
+def _s_member_query(update: Update, context: CallbackContext, text: str):
+    user_id = update.effective_user.id
+    query = clean_input(text)
+    if not query:
+        update.message.reply_text("❌ Invalid input.", reply_markup=member_keyboard())
+        return
+    # membership, expiry/credit, cooldown and in-flight are checked together under the lock
+    refusal = _claim_query(user_id, context, member=True)
+    if refusal:
+        update.message.reply_text(refusal, reply_markup=member_keyboard())
+        return
+    try:
         result = generate_report(query)
         # deduct credits only if member, results appear meaningful
-        if not is_admin(user_id):
-            if result and not result.startswith("🚫") and not math.isinf(credit):
-                MEMBERS[user_id]["credit"] = max(int(credit) - CREDIT_COST_PER_QUERY, 0)
-                save_members()
+        with _STATE_LOCK:
+            # re-read: credit may have changed while the report was being fetched
+            credit = _member_credit(user_id)
+            if user_id in EXPIRY_BY_UID and result and not result.startswith("🚫") and not math.isinf(credit):
+                CREDIT_BY_UID[user_id] = max(int(credit) - CREDIT_COST_PER_QUERY, 0)
+                schedule_save()
+                drop_if_out_of_credit(user_id)
         safe_send(context.bot, update.effective_chat.id, result, reply_markup=member_keyboard())
-        LAST_QUERY_AT[user_id] = datetime.now()
-        context.user_data.pop('awaiting_query', None)
+    finally:
+        release_query(user_id)
+
+
+# Keyboard buttons take precedence over (and cancel) pending input; states are tried in order.
+ADMIN_HANDLERS = {
+    "Add Member": _h_add_member,
+    "Remove Member": _h_remove_member,
+    "Update API Token": _h_update_token,
+    "Status": _h_admin_status,
+    "Help": _h_admin_help,
+    "Mobile/Email": _h_admin_mobile_email,
+}
+ADMIN_STATE_HANDLERS = {
+    "awaiting_member_id": _s_member_id,
+    "awaiting_duration": _s_duration,
+    "awaiting_remove_id": _s_remove_id,
+    "awaiting_api_token": _s_api_token,
+    "awaiting_query": _s_admin_query,
+}
+MEMBER_HANDLERS = {
+    "Status": _h_member_status,
+    "Help": _h_member_help,
+    "Mobile/Email": _h_member_mobile_email,
+}
+MEMBER_STATE_HANDLERS = {
+    "awaiting_query": _s_member_query,
+}
+# Everything a prompt can leave in user_data; cleared whenever a button is tapped
+PENDING_INPUT_KEYS = (
+    'awaiting_member_id',
+    'awaiting_duration',
+    'new_member_id',
+    'awaiting_remove_id',
+    'awaiting_api_token',
+    'awaiting_query',
+)
+
+
+def handle_message(update: Update, context: CallbackContext):
+    user_id = update.effective_user.id
+    text = (update.message.text or "").strip()
+    admin = is_admin(user_id)
+
+    # rate-limited searches bail out before any other work; keyboard commands
+    # (Status, Help, ...) are never held back by the cooldown. This is only an
+    # early exit: _claim_query() re-checks the cooldown when claiming the search.
+    if context.user_data.get('awaiting_query') and text not in (ADMIN_HANDLERS if admin else MEMBER_HANDLERS):
+        with _STATE_LOCK:
+            last = LAST_QUERY_AT.get(user_id)
+        if last and (datetime.now() - last).total_seconds() < SEARCH_COOLDOWN_SECONDS:
+            keyboard = admin_keyboard() if admin else member_keyboard()
+            update.message.reply_text("⏳ Wait before next query.", reply_markup=keyboard)
+            return
+
+    first_name = update.effective_user.first_name or ""
+
+    with _STATE_LOCK:
+        ensure_lifetime_admins()
+        cleanup_expired_members()
+
+        # persist name whenever we see the user
+        if user_id in EXPIRY_BY_UID:
+            if first_name and NAME_BY_UID.get(user_id) != first_name:
+                NAME_BY_UID[user_id] = first_name
+                schedule_save()
+
+    if admin:
+        handlers, state_handlers, keyboard = ADMIN_HANDLERS, ADMIN_STATE_HANDLERS, admin_keyboard
+    elif user_id in EXPIRY_BY_UID:
+        handlers, state_handlers, keyboard = MEMBER_HANDLERS, MEMBER_STATE_HANDLERS, member_keyboard
+    else:
+        update.message.reply_text("❌ Not an active member.", reply_markup=member_keyboard())
         return
 
-    update.message.reply_text("Choose option:", reply_markup=member_keyboard())
+    handler = handlers.get(text)
+    if handler:
+        # the button just tapped becomes the only live prompt
+        for key in PENDING_INPUT_KEYS:
+            context.user_data.pop(key, None)
+        return handler(update, context, text)
+    for state, handler in state_handlers.items():
+        if context.user_data.get(state):
+            return handler(update, context, text)
+
+    update.message.reply_text("Choose option:", reply_markup=keyboard())
 
 
 # ========= MAIN =========
@@ -554,16 +954,28 @@ def main():
     load_members()
     ensure_lifetime_admins()
     cleanup_expired_members()
-
-    updater = Updater(BOT_TOKEN, use_context=True)
+    for uid in list(EXPIRY_BY_UID):
+        drop_if_out_of_credit(uid)
+
+    # never lose a pending debounced save on shutdown: Updater.idle() calls
+    # user_sig_handler on SIGINT/SIGTERM/SIGABRT, atexit covers other exits
+    atexit.register(flush_members)
+
+    updater = Updater(
+        BOT_TOKEN,
+        use_context=True,
+        workers=UPDATE_WORKERS,
+        user_sig_handler=lambda signum, frame: flush_members(),
+    )
     dp = updater.dispatcher
 
     # Commands
-    dp.add_handler(CommandHandler("start", start))
-    dp.add_handler(CommandHandler("help", lambda u, c: handle_message(u, c)))  # map /help to same flow
+    # run_async: v13 only hands updates to the worker pool for async handlers
+    dp.add_handler(CommandHandler("start", start, run_async=True))
+    dp.add_handler(CommandHandler("help", lambda u, c: handle_message(u, c), run_async=True))  # map /help to same flow
 
     # All text messages
-    dp.add_handler(MessageHandler(Filters.text & ~Filters.command, handle_message))
+    dp.add_handler(MessageHandler(Filters.text & ~Filters.command, handle_message, run_async=True))
 
     print("Bot running… Press Ctrl+C to stop.")
     try: